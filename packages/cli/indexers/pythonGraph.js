@@ -24,6 +24,9 @@ export async function buildPythonGraph(options) {
     let stdout = '';
     let stderr = '';
 
+    // Decode as a stream so multi-byte UTF-8 split across chunks stays intact
+    python.stdout.setEncoding('utf8');
+
     python.stdout.on('data', (data) => {
       stdout += data.toString();
     });
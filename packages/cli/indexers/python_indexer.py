@@ -4,65 +4,311 @@ Python AST-based dependency indexer for IntelliMap
 Extracts import relationships from Python code
 """
 
+from __future__ import annotations
+
 import ast
 import json
 import sys
 import argparse
-from pathlib import Path
+import multiprocessing
+import os
+from collections.abc import Iterator
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json is the fallback
+    orjson = None
+
+# Bump when extract_imports output changes so stale caches are discarded
+CACHE_VERSION = 2
+DEFAULT_CACHE_PATH = os.path.join('.intellimap', 'cache', 'imports.json')
+
+# Non-source directories pruned during the scan (plus any *.egg-info)
+SKIP_DIRS = frozenset({'__pycache__', '.venv', 'venv'})
+
+# Below this many files, starting worker processes costs more than it saves.
+# Measured on the stdlib: ~3.7 ms to parse a file, ~0.15 ms per file of IPC,
+# and 15 ms (fork) / 260 ms (spawn, the macOS/Windows default) to start and
+# stop a 2-worker pool. Two workers break even at ~150 files under spawn.
+PARALLEL_MIN_FILES = 200
 
-def extract_imports(file_path):
-    """Extract import statements from a Python file"""
+# Compound statements whose blocks stay at module scope, so imports inside
+# them (conditional, suppressed, ...) are still module-level imports
+BRANCH_NODES = frozenset(
+    {ast.If, ast.Try, ast.With, ast.AsyncWith, ast.For, ast.AsyncFor, ast.While}
+    | {getattr(ast, name) for name in ('TryStar', 'Match') if hasattr(ast, name)}
+)
+
+def iter_module_statements(body: list[ast.stmt]) -> Iterator[ast.stmt]:
+    """Yield module-level statements, descending into every block except def/class bodies"""
+    for node in body:
+        yield node
+        if type(node) in BRANCH_NODES:
+            yield from iter_module_statements(getattr(node, 'body', ()))
+            for clause in getattr(node, 'handlers', []) + getattr(node, 'cases', []):
+                yield from iter_module_statements(clause.body)
+            yield from iter_module_statements(getattr(node, 'orelse', ()))
+            yield from iter_module_statements(getattr(node, 'finalbody', ()))
+
+def extract_imports(file_path: str) -> list[str]:
+    """Extract module-level import statements from a Python file"""
     imports = []
+    # Node types are compared exactly (`type(node) is ...`) rather than with
+    # isinstance, since the parser never produces subclasses; binding them
+    # locally keeps the per-node checks to fast local loads
+    import_node, import_from_node = ast.Import, ast.ImportFrom
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            tree = ast.parse(f.read())
+        # Parse raw bytes: the parser decodes them itself (honouring any
+        # coding cookie), so there is no separate str decode pass
+        with open(file_path, 'rb') as f:
+            data = f.read()
+
+        # Both import forms contain the keyword, so files without it can
+        # skip the parser; false positives simply fall through to ast.parse
+        if b'import' not in data:
+            return imports
 
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
+        tree = ast.parse(data, filename=file_path, type_comments=False)
+
+        for node in iter_module_statements(tree.body):
+            node_type = type(node)
+            if node_type is import_node:
                 for alias in node.names:
-                    imports.append(alias.name)
-            elif isinstance(node, ast.ImportFrom):
+                    imports.append(sys.intern(alias.name))
+            elif node_type is import_from_node:
                 if node.module:
-                    imports.append(node.module)
+                    imports.append(sys.intern(node.module))
     except Exception:
         pass  # Skip files that can't be parsed
 
     return imports
 
-def resolve_import_path(root, import_name):
+def available_cpus() -> int:
+    """Number of CPUs this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def extract_all_imports(py_files: list[str]) -> list[list[str]]:
+    """Extract imports for each file, in parallel for larger trees"""
+    cpus = available_cpus()
+    if cpus <= 1 or len(py_files) < PARALLEL_MIN_FILES:
+        return [extract_imports(py_file) for py_file in py_files]
+
+    try:
+        with multiprocessing.Pool(cpus) as pool:
+            return pool.map(extract_imports, py_files, chunksize=32)
+    except OSError:
+        # Process pools are unavailable in some sandboxes; fall back to serial
+        return [extract_imports(py_file) for py_file in py_files]
+
+def _scan(path: str) -> Iterator[str]:
+    """Recursively yield Python file paths, pruning non-source directories"""
+    with os.scandir(path) as entries:
+        for e in entries:
+            if e.is_symlink():
+                continue
+            if e.is_dir():
+                if e.name in SKIP_DIRS or e.name.endswith('.egg-info'):
+                    continue
+                yield from _scan(e.path)
+            elif e.is_file() and e.name.endswith('.py'):
+                yield e.path
+
+def build_module_map(rel_paths: list[str]) -> dict[str, str]:
+    """Map dotted module names to file paths relative to the root"""
+    module_map = {}
+    packages = {}
+    for rel_path in rel_paths:
+        module_name = rel_path[:-len('.py')].replace(os.sep, '.')
+        module_map[module_name] = rel_path
+        if module_name.endswith('.__init__'):
+            packages[module_name[:-len('.__init__')]] = rel_path
+
+    # A module file takes precedence over a package __init__ of the same name
+    for module_name, rel_path in packages.items():
+        module_map.setdefault(module_name, rel_path)
+
+    return module_map
+
+def resolve_import_path(module_map: dict[str, str], import_name: str) -> str | None:
     """Resolve import name to file path"""
-    # Try as module file
-    module_path = root / (import_name.replace('.', '/') + '.py')
-    if module_path.exists():
-        return str(module_path.relative_to(root))
+    return module_map.get(import_name)
 
-    # Try as package __init__
-    package_path = root / import_name.replace('.', '/') / '__init__.py'
-    if package_path.exists():
-        return str(package_path.relative_to(root))
+def dumps_json(obj: object) -> bytes:
+    """Serialize obj to JSON bytes, using orjson when it is available"""
+    if orjson:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # orjson rejects strings that are not valid UTF-8, such as
+            # surrogate-escaped filenames; stdlib json escapes them instead
+            pass
+    return json.dumps(obj).encode('utf-8')
 
-    return None
+def loads_json(data: bytes) -> object:
+    """Parse JSON bytes, using orjson when it is available"""
+    if orjson:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects the lone-surrogate escapes that json.dumps
+            # writes for non-UTF-8 filenames; stdlib json accepts them
+            pass
+    return json.loads(data)
+
+def load_import_cache(cache_path: str, root_str: str) -> dict[str, dict]:
+    """Load cached per-file imports for root, or {} if missing or stale"""
+    try:
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+        cache = loads_json(data)
+    except (OSError, ValueError):
+        return {}
 
-def build_python_graph(root_path, extra_path=None):
-    """Build dependency graph from Python code"""
+    if not isinstance(cache, dict):
+        return {}
+    if cache.get('version') != CACHE_VERSION or cache.get('root') != os.path.abspath(root_str):
+        return {}
+    files = cache.get('files')
+    return files if isinstance(files, dict) else {}
+
+def cached_imports(entry: object, st: os.stat_result) -> list[str] | None:
+    """Return an entry's imports if it is well-formed and matches st, else None"""
+    if not isinstance(entry, dict):
+        return None
+    if entry.get('mtime_ns') != str(st.st_mtime_ns) or entry.get('size') != st.st_size:
+        return None
+    imports = entry.get('imports')
+    if not isinstance(imports, list) or not all(isinstance(imp, str) for imp in imports):
+        return None
+    return [sys.intern(imp) for imp in imports]
+
+def save_import_cache(cache_path: str, root_str: str, files: dict[str, dict]) -> None:
+    """Persist per-file imports; failures only cost a re-parse next run"""
+    cache = {
+        "version": CACHE_VERSION,
+        "root": os.path.abspath(root_str),
+        "files": files,
+    }
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(dumps_json(cache))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+def compute_scc_ids(node_ids: list[str], edges: list[dict]) -> dict[str, int]:
+    """Assign a strongly connected component id to each node (iterative Tarjan)
+
+    Nodes share an id exactly when they lie on a common import cycle, so
+    consumers can test for cycles without traversing the graph.
+    """
+    adjacency = {node_id: [] for node_id in node_ids}
+    for edge in edges:
+        adjacency[edge["from"]].append(edge["to"])
+
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    scc_ids = {}
+    next_index = 0
+    next_scc = 0
+
+    for start in node_ids:
+        if start in index:
+            continue
+
+        index[start] = lowlink[start] = next_index
+        next_index += 1
+        stack.append(start)
+        on_stack.add(start)
+        work = [(start, iter(adjacency[start]))]
+
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = next_index
+                    next_index += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(adjacency[child])))
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        scc_ids[member] = next_scc
+                        if member == node:
+                            break
+                    next_scc += 1
+
+    return scc_ids
+
+def build_python_graph(root_path: str | os.PathLike, extra_path: str | None = None,
+                       cache_path: str | None = None) -> dict:
+    """Build dependency graph from Python code
+
+    When cache_path is given, files whose mtime and size match the cached
+    entry reuse their recorded imports instead of being parsed again.
+    """
     nodes = []
     edges = []
     node_map = {}
     edge_set = set()
 
-    root = Path(root_path)
-    if not root.exists():
+    root_str = os.fspath(root_path)
+    if not os.path.isdir(root_str):
         return {"nodes": [], "edges": []}
 
-    # Collect all Python files
-    py_files = sorted(root.rglob('*.py'))
+    # Collect all Python files (sorted so output order is stable)
+    py_files = sorted(_scan(root_str))
 
-    for py_file in py_files:
-        # Skip common non-source directories
-        if any(part in py_file.parts for part in ['__pycache__', '.venv', 'venv', '.egg-info']):
-            continue
+    # Scanned paths all start with root_str, so strip the prefix directly
+    prefix_len = len(os.path.join(root_str, ''))
+    rel_paths = [py_file[prefix_len:] for py_file in py_files]
+    module_map = build_module_map(rel_paths)
+
+    stats = [os.stat(py_file) for py_file in py_files]
+    cached_files = load_import_cache(cache_path, root_str) if cache_path else {}
 
-        rel_path = str(py_file.relative_to(root))
+    all_imports = [None] * len(py_files)
+    stale = []
+    for i, (rel_path, st) in enumerate(zip(rel_paths, stats)):
+        imports = cached_imports(cached_files.get(rel_path), st)
+        if imports is not None:
+            all_imports[i] = imports
+        else:
+            stale.append(i)
+
+    # Parse changed files up front; results are merged here so stdout has one writer
+    parsed = extract_all_imports([py_files[i] for i in stale])
+    for i, imports in zip(stale, parsed):
+        all_imports[i] = imports
+
+    if cache_path and (stale or len(cached_files) != len(py_files)):
+        save_import_cache(cache_path, root_str, {
+            rel_path: {
+                # A string: nanosecond mtimes exceed 2**53, which JS numbers would round
+                "mtime_ns": str(st.st_mtime_ns),
+                "size": st.st_size,
+                "imports": imports,
+            }
+            for rel_path, st, imports in zip(rel_paths, stats, all_imports)
+        })
+
+    for rel_path, st, imports in zip(rel_paths, stats, all_imports):
         node_id = rel_path
 
         if node_id not in node_map:
@@ -70,7 +316,7 @@ def build_python_graph(root_path, extra_path=None):
             folder = rel_path.split('/')[0] if '/' in rel_path else rel_path
 
             # Get file size in bytes
-            size = py_file.stat().st_size
+            size = st.st_size
 
             nodes.append({
                 "id": node_id,
@@ -82,17 +328,15 @@ def build_python_graph(root_path, extra_path=None):
                 "size": size,
             })
 
-        # Extract imports
-        imports = extract_imports(py_file)
         for imp in imports:
             # Skip external/stdlib imports
             if imp.startswith('_'):
                 continue
 
             # Resolve local import
-            target_path = resolve_import_path(root, imp)
+            target_path = resolve_import_path(module_map, imp)
             if target_path and target_path != node_id:
-                edge_key = f"{node_id}→{target_path}"
+                edge_key = (node_id, target_path)
                 if edge_key not in edge_set:
                     edge_set.add(edge_key)
                     edges.append({
@@ -101,17 +345,26 @@ def build_python_graph(root_path, extra_path=None):
                         "kind": "import",
                     })
 
+    # Label import cycles once here rather than per query downstream
+    scc_ids = compute_scc_ids([node["id"] for node in nodes], edges)
+    for node in nodes:
+        node["scc"] = scc_ids[node["id"]]
+
     return {"nodes": nodes, "edges": edges}
 
-def main():
+def main() -> None:
     parser = argparse.ArgumentParser(description='Python dependency indexer')
     parser.add_argument('--root', default='backend', help='Root directory for Python code')
     parser.add_argument('--extra-path', help='Extra Python path for imports')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH,
+                        help='Per-file import cache path (default: .intellimap/cache/imports.json)')
+    parser.add_argument('--no-cache', action='store_true', help='Parse every file, ignoring the cache')
 
     args = parser.parse_args()
 
-    graph = build_python_graph(args.root, args.extra_path)
-    print(json.dumps(graph))
+    cache_path = None if args.no_cache else args.cache
+    graph = build_python_graph(args.root, args.extra_path, cache_path)
+    sys.stdout.buffer.write(dumps_json(graph) + b'\n')
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,179 @@
+import { describe, test, expect, beforeAll, afterAll, beforeEach, afterEach } from '@jest/globals';
+import { spawnSync } from 'node:child_process';
+import { mkdtempSync, mkdirSync, writeFileSync, readFileSync, rmSync } from 'node:fs';
+import { tmpdir } from 'node:os';
+import { join, dirname } from 'node:path';
+import { fileURLToPath } from 'node:url';
+
+const __dirname = dirname(fileURLToPath(import.meta.url));
+const indexer = join(__dirname, 'python_indexer.py');
+
+function runIndexer(root, cachePath = null) {
+  const cacheArgs = cachePath ? ['--cache', cachePath] : ['--no-cache'];
+  const result = spawnSync('python3', [indexer, '--root', root, ...cacheArgs], { encoding: 'utf8' });
+  expect(result.status).toBe(0);
+  return JSON.parse(result.stdout);
+}
+
+// Must match CACHE_VERSION in python_indexer.py
+const CACHE_VERSION = 2;
+
+function edgeKeys(graph) {
+  return graph.edges.map(e => `${e.from}→${e.to}`).sort();
+}
+
+describe('python_indexer', () => {
+  let root;
+
+  beforeAll(() => {
+    root = mkdtempSync(join(tmpdir(), 'intellimap-py-'));
+    mkdirSync(join(root, 'pkg'));
+    mkdirSync(join(root, '__pycache__'));
+    writeFileSync(join(root, 'pkg', '__init__.py'), '');
+    writeFileSync(join(root, 'pkg', 'a.py'), [
+      'import pkg.b',
+      'from pkg.b import thing',
+      'from pkg import b',
+      'try:',
+      '    import pkg.b as again',
+      'except ImportError:',
+      '    pass',
+      '',
+    ].join('\n'));
+    writeFileSync(join(root, 'pkg', 'b.py'), 'import pkg.a\nthing = 1\n');
+    writeFileSync(join(root, 'main.py'), [
+      'import pkg',
+      'from contextlib import suppress',
+      'with suppress(ImportError):',
+      '    import pkg.b',
+      '',
+      'def run():',
+      '    import pkg.a',
+      '',
+    ].join('\n'));
+    writeFileSync(join(root, '__pycache__', 'stale.py'), 'import pkg\n');
+  });
+
+  afterAll(() => {
+    rmSync(root, { recursive: true, force: true });
+  });
+
+  test('emits each import edge only once', () => {
+    const graph = runIndexer(root);
+    const keys = graph.edges.map(e => `${e.from}→${e.to}`);
+
+    expect(new Set(keys).size).toBe(keys.length);
+    expect(keys).toContain('pkg/a.py→pkg/b.py');
+    expect(keys).toContain('pkg/a.py→pkg/__init__.py');
+  });
+
+  test('indexes module-level imports only and skips __pycache__', () => {
+    const graph = runIndexer(root);
+
+    expect(graph.nodes.map(n => n.id)).not.toContain('__pycache__/stale.py');
+    // The import under `with suppress(...)` is module scope; the one in run() is not
+    expect(graph.edges.filter(e => e.from === 'main.py')).toEqual([
+      { from: 'main.py', to: 'pkg/__init__.py', kind: 'import' },
+      { from: 'main.py', to: 'pkg/b.py', kind: 'import' },
+    ]);
+  });
+
+  test('assigns import cycles a shared scc id', () => {
+    const graph = runIndexer(root);
+    const scc = Object.fromEntries(graph.nodes.map(n => [n.id, n.scc]));
+
+    expect(scc['pkg/a.py']).toBe(scc['pkg/b.py']);
+    expect(scc['main.py']).not.toBe(scc['pkg/a.py']);
+  });
+});
+
+// Only Linux filesystems reliably accept filenames that are not valid UTF-8
+const linuxOnly = process.platform === 'linux' ? test : test.skip;
+
+describe('python_indexer non-UTF-8 filenames', () => {
+  let dir;
+
+  beforeAll(() => {
+    dir = mkdtempSync(join(tmpdir(), 'intellimap-py-bytes-'));
+  });
+
+  afterAll(() => {
+    rmSync(dir, { recursive: true, force: true });
+  });
+
+  linuxOnly('still emits valid JSON and reuses the cache', () => {
+    const root = join(dir, 'src');
+    const cachePath = join(dir, 'cache', 'imports.json');
+    mkdirSync(root);
+    writeFileSync(Buffer.from(`${root}/caf\xe9.py`, 'latin1'), 'import b\n');
+    writeFileSync(join(root, 'b.py'), 'x = 1\n');
+    writeFileSync(join(root, 'c.py'), 'y = 2\n');
+
+    const graph = runIndexer(root, cachePath);
+
+    expect(graph.nodes).toHaveLength(3);
+    expect(graph.edges).toHaveLength(1);
+
+    // Plant an import only the cache knows about: it shows up only if the
+    // cache (with its escaped non-UTF-8 key) loads on the second run
+    const cache = JSON.parse(readFileSync(cachePath, 'utf8'));
+    cache.files['b.py'].imports = ['c'];
+    writeFileSync(cachePath, JSON.stringify(cache));
+
+    expect(edgeKeys(runIndexer(root, cachePath))).toContain('b.py→c.py');
+  });
+});
+
+describe('python_indexer import cache', () => {
+  let dir;
+  let root;
+  let cachePath;
+
+  beforeEach(() => {
+    dir = mkdtempSync(join(tmpdir(), 'intellimap-py-cache-'));
+    root = join(dir, 'src');
+    cachePath = join(dir, 'cache', 'imports.json');
+    mkdirSync(root);
+    writeFileSync(join(root, 'a.py'), 'import b\n');
+    writeFileSync(join(root, 'b.py'), 'x = 1\n');
+    writeFileSync(join(root, 'c.py'), 'y = 2\n');
+  });
+
+  afterEach(() => {
+    rmSync(dir, { recursive: true, force: true });
+  });
+
+  test('reuses cached imports for unchanged files', () => {
+    expect(edgeKeys(runIndexer(root, cachePath))).toEqual(['a.py→b.py']);
+
+    // Rewrite the cached entry without touching a.py: a hit must return it as-is
+    const cache = JSON.parse(readFileSync(cachePath, 'utf8'));
+    cache.files['a.py'].imports = ['c'];
+    writeFileSync(cachePath, JSON.stringify(cache));
+
+    expect(edgeKeys(runIndexer(root, cachePath))).toEqual(['a.py→c.py']);
+  });
+
+  test('re-parses files that changed since they were cached', () => {
+    runIndexer(root, cachePath);
+    writeFileSync(join(root, 'a.py'), 'import b\nimport c\n');
+
+    expect(edgeKeys(runIndexer(root, cachePath))).toEqual(['a.py→b.py', 'a.py→c.py']);
+  });
+
+  test('treats a corrupt or malformed cache as empty', () => {
+    const expected = edgeKeys(runIndexer(root, null));
+    mkdirSync(dirname(cachePath), { recursive: true });
+
+    for (const contents of [
+      '{not json',
+      '[]',
+      JSON.stringify({ version: CACHE_VERSION, root, files: [] }),
+      JSON.stringify({ version: CACHE_VERSION, root, files: { 'a.py': { size: 9, imports: ['c'] } } }),
+      JSON.stringify({ version: CACHE_VERSION, root, files: { 'a.py': 'stale' } }),
+    ]) {
+      writeFileSync(cachePath, contents);
+      expect(edgeKeys(runIndexer(root, cachePath))).toEqual(expected);
+    }
+  });
+});
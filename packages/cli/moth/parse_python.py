@@ -4,50 +4,94 @@ Python AST Parser for MOTH Generator
 Extracts imports and symbols from Python source code using AST parsing.
 """
 
+from __future__ import annotations
+
 import ast
 import sys
 import json
 
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json is the fallback
+    orjson = None
+
+
+# Statement fields holding nested blocks that stay at module scope
+BLOCK_FIELDS = ('body', 'orelse', 'finalbody')
+
 
 class Analyzer(ast.NodeVisitor):
-    """AST visitor that extracts imports and symbol definitions."""
+    """
+    AST visitor that extracts imports and symbol definitions.
+
+    Only module scope is indexed: function and class bodies are not
+    descended into, while module-level blocks such as if/try are, so
+    conditional imports (e.g. ``if TYPE_CHECKING:``) are still found.
+    """
+
+    imports: set[str]
+    symbols: set[str]
     
-    def __init__(self):
+    def __init__(self) -> None:
         self.imports = set()
         self.symbols = set()
     
-    def visit_Import(self, node):
+    def visit_Module(self, node: ast.Module) -> None:
+        """Scan module-level statements without a generic_visit descent"""
+        self.visit_body(node.body)
+
+    def visit_body(self, body: list[ast.stmt]) -> None:
+        """Dispatch each statement, recursing only into nested blocks"""
+        for node in body:
+            method = getattr(self, 'visit_' + node.__class__.__name__, None)
+            if method is not None:
+                method(node)
+                continue
+            # if/for/while/with/try/match: their blocks are still module scope
+            for field in BLOCK_FIELDS:
+                self.visit_body(getattr(node, field, ()))
+            for clause in getattr(node, 'handlers', []) + getattr(node, 'cases', []):
+                self.visit_body(clause.body)
+
+    def visit_Import(self, node: ast.Import) -> None:
         """Handle: import module"""
         for alias in node.names:
             self.imports.add(alias.name)
-        self.generic_visit(node)
     
-    def visit_ImportFrom(self, node):
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
         """Handle: from module import name"""
         if node.module:
             self.imports.add(node.module)
         # Optionally add imported names as well
         # for alias in node.names:
         #     self.imports.add(f"{node.module}.{alias.name}")
-        self.generic_visit(node)
     
-    def visit_FunctionDef(self, node):
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
         """Handle: def function_name()"""
         self.symbols.add(node.name)
-        self.generic_visit(node)
     
-    def visit_AsyncFunctionDef(self, node):
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
         """Handle: async def function_name()"""
         self.symbols.add(node.name)
-        self.generic_visit(node)
     
-    def visit_ClassDef(self, node):
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
         """Handle: class ClassName"""
         self.symbols.add(node.name)
-        self.generic_visit(node)
 
 
-def analyze_code(code):
+def dumps_json(obj: object) -> bytes:
+    """Serialize obj to JSON bytes, using orjson when it is available"""
+    if orjson:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # orjson rejects strings that are not valid UTF-8 (e.g. lone
+            # surrogates); stdlib json escapes them instead
+            pass
+    return json.dumps(obj).encode('utf-8')
+
+
+def analyze_code(code: str) -> dict:
     """
     Parse Python code and extract imports and symbols.
     
@@ -79,5 +123,5 @@ if __name__ == "__main__":
     code_to_analyze = sys.stdin.read()
     results = analyze_code(code_to_analyze)
     # Output JSON to stdout
-    print(json.dumps(results))
+    sys.stdout.buffer.write(dumps_json(results) + b'\n')
 
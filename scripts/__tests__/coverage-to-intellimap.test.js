@@ -0,0 +1,98 @@
+import { describe, test, expect, beforeEach, afterEach } from '@jest/globals';
+import { execFileSync } from 'node:child_process';
+import { mkdtempSync, readdirSync, readFileSync, writeFileSync, rmSync } from 'node:fs';
+import { tmpdir } from 'node:os';
+import { join, dirname } from 'node:path';
+import { fileURLToPath } from 'node:url';
+
+const __dirname = dirname(fileURLToPath(import.meta.url));
+const script = join(__dirname, '..', 'coverage-to-intellimap.py');
+
+// Isolate from the developer's global/system git config
+const gitEnv = {
+  ...process.env,
+  HOME: tmpdir(),
+  GIT_CONFIG_NOSYSTEM: '1',
+  GIT_CEILING_DIRECTORIES: tmpdir(),
+  GIT_AUTHOR_NAME: 'test',
+  GIT_AUTHOR_EMAIL: 'test@example.com',
+  GIT_COMMITTER_NAME: 'test',
+  GIT_COMMITTER_EMAIL: 'test@example.com',
+};
+
+function git(repo, ...args) {
+  return execFileSync('git', args, { cwd: repo, env: gitEnv, encoding: 'utf8' }).trim();
+}
+
+function getGitInfo(repo) {
+  const code = [
+    'import importlib.util, json, sys',
+    'spec = importlib.util.spec_from_file_location("cov", sys.argv[1])',
+    'mod = importlib.util.module_from_spec(spec)',
+    'spec.loader.exec_module(mod)',
+    'print(json.dumps(mod.get_git_info()))',
+  ].join('\n');
+  return JSON.parse(execFileSync('python3', ['-c', code, script], { cwd: repo, env: gitEnv, encoding: 'utf8' }));
+}
+
+describe('coverage-to-intellimap get_git_info', () => {
+  let repo;
+
+  beforeEach(() => {
+    repo = mkdtempSync(join(tmpdir(), 'intellimap-git-'));
+    git(repo, 'init', '-q');
+    git(repo, 'symbolic-ref', 'HEAD', 'refs/heads/main');
+    git(repo, 'commit', '-q', '--allow-empty', '-m', 'initial');
+  });
+
+  afterEach(() => {
+    rmSync(repo, { recursive: true, force: true });
+  });
+
+  test('reports the branch regardless of log decoration config', () => {
+    git(repo, 'config', 'log.decorate', 'full');
+    git(repo, 'config', 'log.excludeDecoration', 'refs/heads/*');
+
+    expect(getGitInfo(repo)).toEqual(['main', git(repo, 'rev-parse', '--short', 'HEAD')]);
+  });
+
+  test('reports HEAD as the branch when detached', () => {
+    git(repo, 'checkout', '-q', '--detach');
+
+    expect(getGitInfo(repo)).toEqual(['HEAD', git(repo, 'rev-parse', '--short', 'HEAD')]);
+  });
+
+  test('falls back to unknown outside a git repository', () => {
+    rmSync(join(repo, '.git'), { recursive: true, force: true });
+
+    expect(getGitInfo(repo)).toEqual(['unknown', 'unknown']);
+  });
+});
+
+describe('coverage-to-intellimap convert_coverage', () => {
+  let dir;
+
+  beforeEach(() => {
+    dir = mkdtempSync(join(tmpdir(), 'intellimap-cov-'));
+  });
+
+  afterEach(() => {
+    rmSync(dir, { recursive: true, force: true });
+  });
+
+  test('converts reports with surrogate-escaped (non-UTF-8) paths', () => {
+    // What stdlib json writes for a file named caf\xe9.py
+    writeFileSync(join(dir, '.coverage.json'),
+      '{"files": {"caf\\udce9.py": {"summary": {"num_statements": 4, "covered_lines": 3}, "executed_lines": [1, 2, 3]}}}');
+
+    execFileSync('python3', [script], { cwd: dir, env: gitEnv, encoding: 'utf8' });
+
+    const runtimeDir = join(dir, '.intellimap', 'runtime');
+    const [traceFile] = readdirSync(runtimeDir);
+    const trace = JSON.parse(readFileSync(join(runtimeDir, traceFile), 'utf8'));
+
+    expect(trace.nodes).toEqual([
+      { id: 'caf\udce9.py', executionCount: 3, totalTime: 0.03, coverage: 75 },
+    ]);
+  });
+});
@@ -6,12 +6,42 @@ Convert coverage.py data to IntelliMap runtime trace format
 import json
 import os
 import subprocess
+import time
 from pathlib import Path
-from datetime import datetime
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; stdlib json is the fallback
+    orjson = None
+
+def loads_json(data):
+    """Parse JSON bytes, using orjson when it is available"""
+    if orjson:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects the lone-surrogate escapes that json.dumps
+            # writes for non-UTF-8 filenames; stdlib json accepts them
+            pass
+    return json.loads(data)
+
+def dumps_json(obj):
+    """Serialize obj to indented JSON bytes, using orjson when it is available"""
+    if orjson:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            # orjson rejects strings that are not valid UTF-8 (e.g. lone
+            # surrogates); stdlib json escapes them instead
+            pass
+    return json.dumps(obj, indent=2).encode('utf-8')
 
 def get_git_info():
     try:
-        branch = subprocess.check_output(['git', 'rev-parse', '--abbrev-ref', 'HEAD'], 
+        # Kept as two rev-parse calls: --abbrev-ref applies to every later
+        # revision argument, and a single `git log --format=%D` depends on
+        # the user's log.decorate / log.excludeDecoration settings
+        branch = subprocess.check_output(['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
                                         stderr=subprocess.DEVNULL).decode().strip()
         commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
                                         stderr=subprocess.DEVNULL).decode().strip()
@@ -29,15 +59,24 @@ def convert_coverage():
         print('   Then: coverage json')
         return
     
-    with open('.coverage.json', 'r') as f:
-        coverage_data = json.load(f)
+    with open('.coverage.json', 'rb') as f:
+        data = f.read()
+    coverage_data = loads_json(data)
     
     nodes = []
     files = coverage_data.get('files', {})
+
+    # coverage.py records absolute paths; stripping the cwd prefix avoids a
+    # full os.path.relpath (getcwd + normalisation) for every file
+    cwd = os.getcwd()
+    cwd_prefix = os.path.join(cwd, '')
     
     for filepath, file_data in files.items():
         # Get relative path
-        rel_path = os.path.relpath(filepath)
+        if filepath.startswith(cwd_prefix):
+            rel_path = filepath[len(cwd_prefix):]
+        else:
+            rel_path = os.path.relpath(filepath, cwd)
         
         # Calculate coverage
         summary = file_data.get('summary', {})
@@ -58,13 +97,17 @@ def convert_coverage():
     # Get git info
     branch, commit = get_git_info()
     
+    # One clock read so the metadata, run id and file name agree
+    now_ms = int(time.time() * 1000)
+    now_s = now_ms // 1000
+
     # Create trace
     trace = {
         'metadata': {
-            'timestamp': int(datetime.now().timestamp() * 1000),
+            'timestamp': now_ms,
             'branch': branch,
             'commit': commit,
-            'runId': f'coverage-{int(datetime.now().timestamp())}',
+            'runId': f'coverage-{now_s}',
             'environment': os.getenv('ENVIRONMENT', 'test'),
             'description': 'coverage.py data',
             'source': 'coverage.py'
@@ -77,9 +120,9 @@ def convert_coverage():
     runtime_dir = Path('.intellimap/runtime')
     runtime_dir.mkdir(parents=True, exist_ok=True)
     
-    trace_file = runtime_dir / f'trace-{int(datetime.now().timestamp() * 1000)}.json'
-    with open(trace_file, 'w') as f:
-        json.dump(trace, f, indent=2)
+    trace_file = runtime_dir / f'trace-{now_ms}.json'
+    with open(trace_file, 'wb') as f:
+        f.write(dumps_json(trace))
     
     print(f'✅ Converted coverage.py data to IntelliMap trace!')
     print(f'📁 Saved to: {trace_file}')